@@ -20,9 +20,17 @@ SYSTEM_PROMPT = (
 # Initialize the LLM without the system_prompt parameter
 llm = ChatVertexAI(model_name="gemini-2.5-pro-preview-03-25")
 
-def compliance_agent(query: str) -> str:
+def compliance_agent(query: str, history: list = None, summary: str = "") -> str:
+    """
+    Answer a compliance query. Optional history (prior Human/AI messages) and
+    summary (condensed earlier conversation) give the model conversational context.
+    """
+    system = SYSTEM_PROMPT
+    if summary:
+        system += f"\n\nSummary of the earlier conversation: {summary}"
     messages = [
-        SystemMessage(content=SYSTEM_PROMPT),
+        SystemMessage(content=system),
+        *(history or []),
         HumanMessage(content=query)
     ]
     try:
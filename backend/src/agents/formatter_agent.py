@@ -30,8 +30,8 @@ _FORMATTER_SYSTEM = (
     ""
 )
 
-def formatter_agent(query: str, transaction: dict, prediction: dict) -> str:
-    """Return a polished answer combining query, transaction, and model output."""
+def formatter_agent(query: str, transaction: dict, prediction: dict, history: list = None, summary: str = "") -> str:
+    """Return a polished answer combining query, transaction, model output and any prior conversation."""
     try:
         # Prepare messages
         human = HumanMessage(content=_FORMATTER_SYSTEM.format(
@@ -39,9 +39,9 @@ def formatter_agent(query: str, transaction: dict, prediction: dict) -> str:
             transaction=json.dumps(transaction, indent=2),
             prediction=json.dumps(prediction, indent=2)
         ))
-        sys    = SystemMessage(content="")  # no extra system needed
+        sys    = SystemMessage(content=f"Summary of the earlier conversation: {summary}" if summary else "")
         # Call formatter LLM
-        ai_msg = _formatter_llm.predict_messages([sys, human])
+        ai_msg = _formatter_llm.predict_messages([sys, *(history or []), human])
         log_event("Formatter output", {"response": ai_msg.content})
         return ai_msg.content
     except Exception as e:
@@ -1,6 +1,6 @@
-import numpy as np
 import joblib
 import os
+from src.model import feature_schema
 from src.utils.logger import log_event
 
 # Path to the pretrained fraud detection model
@@ -15,36 +15,24 @@ except Exception as e:
 def extract_features(data: dict):
     """
     Extract features from a transaction dictionary to mimic real-world behavior.
-    Expected fields: amount, ip_distance, device_type_id, time_of_day, tx_frequency,
-    merchant_risk, account_age, and location_deviation.
+    Expected fields are those of the feature schema (see src/model/feature_schema.py);
+    missing fields take the schema defaults.
     """
-    try:
-        amount = float(data.get("amount", 0))
-        ip_distance = float(data.get("ip_distance", 0))
-        device_type_id = int(data.get("device_type_id", 1))
-        time_of_day = float(data.get("time_of_day", 12))
-        tx_frequency = float(data.get("tx_frequency", 1))
-        merchant_risk = float(data.get("merchant_risk", 0.5))
-        account_age = float(data.get("account_age", 365))
-        location_deviation = float(data.get("location_deviation", 0))
-    except (ValueError, TypeError) as e:
-        log_event("Feature extraction error", {"error": str(e)})
-        raise ValueError("Invalid input data types for transaction features.")
-        
-    features = np.array([
-        amount,
-        ip_distance,
-        device_type_id,
-        time_of_day,
-        tx_frequency,
-        merchant_risk,
-        account_age,
-        location_deviation
-    ]).reshape(1, -1)
+    features, valid = feature_schema.from_dict(data)
+    if not valid:
+        log_event("Feature extraction error", {"transaction": data})
+        raise ValueError("Invalid or out-of-range transaction features.")
     
     log_event("Extracted features", {"features": features.tolist()})
     return features
 
+def _risk_level(fraud_prob: float) -> str:
+    if fraud_prob > 0.75:
+        return "high"
+    elif fraud_prob > 0.5:
+        return "medium"
+    return "low"
+
 def fraud_agent(transaction: dict) -> dict:
     """
     Evaluate a transaction using the fraud detection model.
@@ -56,19 +44,37 @@ def fraud_agent(transaction: dict) -> dict:
     try:
         features = extract_features(transaction)
         fraud_prob = model.predict_proba(features)[0][1]
-        if fraud_prob > 0.75:
-            risk_level = "high"
-        elif fraud_prob > 0.5:
-            risk_level = "medium"
-        else:
-            risk_level = "low"
-            
+        risk_level = _risk_level(fraud_prob)
+
         log_event("Fraud evaluation", {"fraud_probability": fraud_prob, "risk_level": risk_level})
         return {"fraud_probability": fraud_prob, "risk_level": risk_level}
     except Exception as e:
         log_event("Error evaluating transaction", {"error": str(e)})
         return {"error": "Failed to evaluate transaction"}
 
+def fraud_agent_batch(transactions: list) -> list:
+    """
+    Evaluate a list of transactions with a single model call.
+    Returns one result dictionary per transaction, in input order. Rows with
+    invalid or out-of-range feature values get an error entry instead of a score.
+    """
+    if model is None:
+        return [{"error": "Model not loaded"} for _ in transactions]
+
+    features, valid = feature_schema.from_records(transactions)
+    results = [{"error": "Invalid or out-of-range transaction features."} for _ in transactions]
+    if valid.any():
+        try:
+            probs = model.predict_proba(features[valid])[:, 1]
+        except Exception as e:
+            log_event("Error evaluating transaction batch", {"error": str(e)})
+            return [{"error": "Failed to evaluate transaction"} for _ in transactions]
+        for i, fraud_prob in zip(valid.nonzero()[0], probs.tolist()):
+            results[i] = {"fraud_probability": fraud_prob, "risk_level": _risk_level(fraud_prob)}
+
+    log_event("Fraud batch evaluation", {"size": len(transactions), "scored": int(valid.sum())})
+    return results
+
 def simulate_transaction() -> dict:
     """
     Simulate a realistic transaction for testing purposes.
@@ -1,12 +1,15 @@
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 import vertexai
 from langchain_google_vertexai import ChatVertexAI
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
 from src.agents.compliance_agent import compliance_agent
 from src.agents.fraud_agent import fraud_agent
 from src.agents.formatter_agent import formatter_agent
+from src.config import Config
+from src.model.feature_schema import EXAMPLE_TRANSACTION
 from src.utils.logger import log_event
 
 # Initialize Vertex AI with your project info
@@ -16,9 +19,28 @@ vertexai.init(project=os.environ.get("GOOGLE_CLOUD_PROJECT", "us-con-gcp-sbx-000
 ORCHESTRATOR_PROMPT = (
     "You are an intelligent orchestrator for agents in a risk management and compliance platform. "
     "Analyze the provided query and decide whether it should be delegated to 'compliance', 'fraud', "
-    "or if none of them can address it. Return a JSON with the field 'agent', e.g., {\"agent\": \"compliance\"}. "
-    "If not applicable, respond with {\"agent\": \"none\"}."
+    "or if none of them can address it. The query may come with a summary and the latest turns of the "
+    "conversation; use them to resolve follow-up questions such as 'why is it that high?'. "
+    "Return a JSON with the fields 'agent' and 'confidence' (0 to 1), e.g., "
+    "{\"agent\": \"compliance\", \"confidence\": 0.9}. "
+    "If not applicable, respond with {\"agent\": \"none\", \"confidence\": 0.9}."
 )
+# Latest turns shown to the router, and the confidence it needs to move a
+# conversation about a saved transaction away from the fraud agent
+ROUTING_CONTEXT_TURNS = 2
+ROUTING_CONTEXT_CHARS = 500
+ROUTING_MIN_CONFIDENCE = 0.7
+
+# Prompt used to fold old session turns into a running summary
+SUMMARY_PROMPT = (
+    "You condense conversations between a user and a risk & compliance assistant. "
+    "Merge the existing summary with the new turns into a short paragraph that keeps the facts, figures, "
+    "transactions and decisions needed to answer follow-up questions. Reply with the summary only."
+)
+SUMMARY_MAX_CHARS = 2000
+
+# Summaries are produced off the request path
+_summarizer = ThreadPoolExecutor(max_workers=2)
 
 # Initialize the LLM without passing system_prompt in the constructor.
 llm = ChatVertexAI(model_name="gemini-2.5-pro-preview-03-25")
@@ -50,46 +72,153 @@ def _unwrap_result(result):
         return result
     return str(result)
 
-def intelligent_orchestrator(query: str, transaction: dict = None) -> str:
+def _truncate(text: str, limit: int) -> str:
+    """Keep the start of text, cut at a word boundary to at most limit characters."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 1]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > 0 else cut).rstrip() + "…"
+
+def _routing_context(session) -> list:
+    if session is None:
+        return []
+    context = []
+    if session.summary:
+        context.append(f"Conversation summary: {session.summary}")
+    recent = session.history[-2 * ROUTING_CONTEXT_TURNS:]
+    if recent:
+        context.append("Latest turns:\n" + "\n".join(
+            f"{role}: {_truncate(content, ROUTING_CONTEXT_CHARS)}" for role, content in recent
+        ))
+    if session.agent:
+        context.append(f"Previous agent: {session.agent}")
+    if session.transaction:
+        context.append("A transaction is saved in this conversation.")
+    return context
+
+def _route(query: str, session=None) -> tuple:
+    """Ask the LLM which agent should handle the query; returns (agent, confidence)."""
+    messages = [
+        SystemMessage(content=ORCHESTRATOR_PROMPT),
+        HumanMessage(content="\n\n".join(_routing_context(session) + [f"Query: {query}"]))
+    ]
+    raw_response = llm.predict_messages(messages)
+    log_event("Orchestrator raw response", {"raw_response": raw_response})
+
+    # Clean & parse JSON
     try:
-        messages = [
-            SystemMessage(content=ORCHESTRATOR_PROMPT),
-            HumanMessage(content=f"Query: {query}")
-        ]
-        raw_response = llm.predict_messages(messages)
-        log_event("Orchestrator raw response", {"raw_response": raw_response})
-
-        # Clean & parse JSON
-        try:
-            #json_str = _extract_json(raw_response)
-            content = getattr(raw_response, "content", str(raw_response))
-            json_str = _extract_json(content)
-            log_event("The AI message content is as such:", {"json_str": json_str})
-            decision = json.loads(json_str)
-        except Exception as e:
-            log_event("Failed to parse orchestrator JSON", {"error": str(e), "raw": raw_response})
-            decision = {"agent": "none"}
-        
-        if decision.get("agent") == "compliance":
-            return _unwrap_result(compliance_agent(query))
-        elif decision.get("agent") == "fraud":
+        content = getattr(raw_response, "content", str(raw_response))
+        json_str = _extract_json(content)
+        log_event("The AI message content is as such:", {"json_str": json_str})
+        decision = json.loads(json_str)
+        confidence = float(decision.get("confidence", 1.0))
+    except Exception as e:
+        log_event("Failed to parse orchestrator JSON", {"error": str(e), "raw": raw_response})
+        decision, confidence = {"agent": "none"}, 0.0
+    return decision.get("agent", "none"), confidence
+
+def _score(transaction: dict, session=None) -> dict:
+    """Score a transaction, reusing the session's cached result for its saved transaction."""
+    cacheable = session is not None and transaction == session.transaction
+    if cacheable and session.fraud_result is not None:
+        log_event("Reusing cached fraud score", {"session_id": session.session_id})
+        return session.fraud_result
+    result = fraud_agent(transaction) or {}
+    if cacheable and "error" not in result:
+        session.fraud_result = result
+    return result
+
+def _history_messages(session) -> list:
+    if session is None:
+        return []
+    recent = session.history[-2 * Config.SESSION_HISTORY_TURNS * 2:]
+    return [
+        HumanMessage(content=content) if role == "user" else AIMessage(content=content)
+        for role, content in recent
+    ]
+
+def _schedule_compaction(session):
+    """
+    Once the verbatim history exceeds twice the configured number of turns, fold
+    the oldest turns into the session summary in the background. Called with
+    session.lock held.
+    """
+    keep = Config.SESSION_HISTORY_TURNS * 2
+    if session.compacting or len(session.history) <= 2 * keep:
+        return
+    session.compacting = True
+    _summarizer.submit(_compact_history, session, session.history[:-keep])
+
+def _compact_history(session, old: list):
+    transcript = "\n".join(f"{role}: {content}" for role, content in old)
+    try:
+        response = llm.predict_messages([
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"Existing summary: {session.summary or '(none)'}\n\nNew turns:\n{transcript}")
+        ])
+        summary = _truncate(getattr(response, "content", str(response)).strip(), SUMMARY_MAX_CHARS)
+    except Exception as e:
+        log_event("Error summarizing session history", {"error": str(e)})
+        summary = None
+
+    with session.lock:
+        if summary is not None:
+            session.summary = summary
+            # Only appends happen meanwhile, so the folded turns are still at the front
+            del session.history[:len(old)]
+        else:
+            # Keep the previous summary and retry on a later turn, bounding stored history
+            del session.history[:-4 * Config.SESSION_HISTORY_TURNS * 2]
+        session.compacting = False
+
+def intelligent_orchestrator(query: str, transaction: dict = None, session=None, follow_up: bool = False,
+                             clear_transaction: bool = False) -> str:
+    """
+    Route a query to the right agent and return its answer.
+    With a session, the conversation so far is passed to the agents, the transaction
+    context and its fraud score are kept between turns, and follow-up queries reuse
+    the previous routing decision instead of calling the router again.
+    clear_transaction drops the session's saved transaction and cached score.
+    """
+    try:
+        if session is not None:
+            if transaction is not None or clear_transaction:
+                session.set_transaction(transaction)
+            transaction = session.transaction
+
+        if follow_up and session is not None and session.agent in ("compliance", "fraud"):
+            agent = session.agent
+            log_event("Reusing session routing decision", {"session_id": session.session_id, "agent": agent})
+        else:
+            agent, confidence = _route(query, session)
+            if (session is not None and session.agent == "fraud" and session.transaction
+                    and agent != "fraud" and confidence < ROUTING_MIN_CONFIDENCE):
+                log_event("Keeping fraud agent for saved transaction", {
+                    "session_id": session.session_id, "router_agent": agent, "confidence": confidence
+                })
+                agent = "fraud"
+
+        history = _history_messages(session)
+        summary = session.summary if session is not None else ""
+        if agent == "compliance":
+            answer = _unwrap_result(compliance_agent(query, history, summary))
+        elif agent == "fraud":
             # Use provided transaction data if available; otherwise, fallback to a dummy transaction.
             if transaction is None:
-                transaction = {
-                    "amount": 900,
-                    "ip_distance": 120,
-                    "device_type_id": 2,
-                    "time_of_day": 23,
-                    "tx_frequency": 5,
-                    "merchant_risk": 0.7,
-                    "account_age": 500,
-                    "location_deviation": 10
-                }
-            return _unwrap_result(
-                formatter_agent(query, fraud_agent(transaction) or {}, fraud_agent(transaction))
+                transaction = dict(EXAMPLE_TRANSACTION)
+            answer = _unwrap_result(
+                formatter_agent(query, transaction, _score(transaction, session), history, summary)
             )
         else:
-            return "I'm sorry, I cannot resolve that query at this time."
+            answer = "I'm sorry, I cannot resolve that query at this time."
+
+        if session is not None:
+            session.agent = agent
+            session.history.append(("user", query))
+            session.history.append(("assistant", answer if isinstance(answer, str) else json.dumps(answer)))
+            _schedule_compaction(session)
+        return answer
     except Exception as e:
         log_event("Error in orchestrator", {"error": str(e)})
         return "Error processing the query."
@@ -4,3 +4,7 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "change-this-in-production")
     API_KEY = os.environ.get("API_KEY", "default-api-key")
     DEBUG = os.environ.get("DEBUG", "False") == "True"
+    MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 1000))
+    SESSION_MAX = int(os.environ.get("SESSION_MAX", 1000))
+    SESSION_TTL = int(os.environ.get("SESSION_TTL", 3600))
+    SESSION_HISTORY_TURNS = int(os.environ.get("SESSION_HISTORY_TURNS", 4))
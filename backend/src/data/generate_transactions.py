@@ -1,5 +1,8 @@
+# Run from backend/src, like the model trainer:
+#   python -m data.generate_transactions
 import numpy as np
 import pandas as pd
+from model import feature_schema
 
 # Set a random seed for reproducibility
 np.random.seed(42)
@@ -42,7 +45,7 @@ loc_dev_high = np.random.uniform(20, 100, size=int(0.05 * num_transactions))
 location_deviation = np.concatenate([loc_dev_low, loc_dev_high])
 np.random.shuffle(location_deviation)
 
-# Create a DataFrame with rounded values
+# Create a DataFrame with rounded values, in schema column order and dtypes
 df = pd.DataFrame({
     "amount": np.round(amount, 2),
     "ip_distance": np.round(ip_distance, 2),
@@ -52,9 +55,9 @@ df = pd.DataFrame({
     "merchant_risk": np.round(merchant_risk, 2),
     "account_age": np.round(account_age, 2),
     "location_deviation": np.round(location_deviation, 2)
-})
+})[list(feature_schema.FEATURE_NAMES)].astype(feature_schema.FEATURE_DTYPES)
 
 # Save the generated data to a CSV file
-output_file = "transactions_sample.csv"
+output_file = "data/transactions_sample.csv"
 df.to_csv(output_file, index=False)
 print(f"Sample transaction data generated and saved to '{output_file}'")
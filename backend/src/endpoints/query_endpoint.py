@@ -1,10 +1,13 @@
 import traceback
 from flask import Blueprint, request, jsonify
 from src.agents.orchestrator import intelligent_orchestrator
+from src.config import Config
 from src.utils.logger import log_event
 from src.utils.security import require_api_key
+from src.utils.session_store import SessionStore
 
 query_bp = Blueprint("query", __name__)
+session_store = SessionStore(max_sessions=Config.SESSION_MAX, ttl_seconds=Config.SESSION_TTL)
 
 @query_bp.route("/query", methods=["POST"])
 @require_api_key
@@ -13,12 +16,37 @@ def query():
         payload = request.get_json()
         user_query = payload.get("query")
         txn = payload.get("transaction")  # <-- grab the transaction block
+        clear_txn = "transaction" in payload and txn is None  # explicit null clears the session's context
         if not user_query:
             return jsonify({"error": "The 'query' parameter is required"}), 400
         
-        log_event("Query received", {"query": user_query})
-        response = intelligent_orchestrator(user_query, transaction=txn)
-        return jsonify({"response": response}), 200
+        session_id = payload.get("session_id")
+        if session_id is not None and not isinstance(session_id, str):
+            return jsonify({"error": "The 'session_id' parameter must be a string"}), 400
+        if session_id:
+            session = session_store.get(session_id)
+            if session is None:
+                return jsonify({"error": "Session not found or expired"}), 404
+        else:
+            session = session_store.create()
+        log_event("Query received", {"query": user_query, "session_id": session.session_id})
+        with session.lock:
+            response = intelligent_orchestrator(
+                user_query,
+                transaction=txn,
+                session=session,
+                follow_up=bool(payload.get("follow_up")),
+                clear_transaction=clear_txn,
+            )
+        return jsonify({"response": response, "session_id": session.session_id}), 200
     except Exception as e:
         log_event("Error in query endpoint", {"error": str(e), "trace": traceback.format_exc()})
         return jsonify({"error": "Internal server error"}), 500
+
+@query_bp.route("/session/<session_id>", methods=["DELETE"])
+@require_api_key
+def delete_session(session_id):
+    if not session_store.delete(session_id):
+        return jsonify({"error": "Session not found"}), 404
+    log_event("Session deleted", {"session_id": session_id})
+    return jsonify({"status": "deleted"}), 200
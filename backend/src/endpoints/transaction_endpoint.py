@@ -1,6 +1,7 @@
 import traceback
-from flask import Blueprint, request, jsonify
-from src.agents.fraud_agent import fraud_agent
+from flask import Blueprint, current_app, request, jsonify
+from src.agents.fraud_agent import fraud_agent, fraud_agent_batch
+from src.model import feature_schema
 from src.utils.logger import log_event
 from src.utils.security import require_api_key
 
@@ -22,3 +23,31 @@ def predict_transaction():
     except Exception as e:
         log_event("Error in predict_transaction", {"error": str(e), "trace": traceback.format_exc()})
         return jsonify({"error": "Internal server error"}), 500
+
+@transaction_bp.route("/predict_batch", methods=["POST"])
+@require_api_key
+def predict_batch():
+    try:
+        payload = request.get_json()
+        txns = payload.get("transactions")
+
+        if not txns or not isinstance(txns, list):
+            return jsonify({"error": "The 'transactions' list is required"}), 400
+        max_size = current_app.config["MAX_BATCH_SIZE"]
+        if len(txns) > max_size:
+            return jsonify({"error": f"Batch size exceeds the limit of {max_size} transactions"}), 413
+
+        log_event("Transaction batch received", {"size": len(txns)})
+        results = fraud_agent_batch(txns)
+        return jsonify({"results": results}), 200
+    except Exception as e:
+        log_event("Error in predict_batch", {"error": str(e), "trace": traceback.format_exc()})
+        return jsonify({"error": "Internal server error"}), 500
+
+@transaction_bp.route("/feature_schema", methods=["GET"])
+@require_api_key
+def get_feature_schema():
+    return jsonify({
+        "features": feature_schema.describe(),
+        "max_batch_size": current_app.config["MAX_BATCH_SIZE"],
+    }), 200
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+from typing import NamedTuple
+
+# Single source of truth for the fraud model's input features. This module only
+# depends on numpy/pandas (pyarrow is imported lazily) so it can be imported by
+# the standalone data/model scripts as well as the Flask app.
+
+
+class Feature(NamedTuple):
+    name: str
+    dtype: str
+    default: float
+    min: float
+    max: float
+
+
+# Column order matters: it is the column order of every feature matrix.
+FEATURES = (
+    Feature("amount",             "float32", 0.0,   0.0, 1e6),
+    Feature("ip_distance",        "float32", 0.0,   0.0, 20040.0),
+    Feature("device_type_id",     "int8",    1,     1,   3),
+    Feature("time_of_day",        "float32", 12.0,  0.0, 24.0),
+    Feature("tx_frequency",       "float32", 1.0,   0.0, 1000.0),
+    Feature("merchant_risk",      "float32", 0.5,   0.0, 1.0),
+    Feature("account_age",        "float32", 365.0, 0.0, 36500.0),
+    Feature("location_deviation", "float32", 0.0,   0.0, 20040.0),
+)
+
+FEATURE_NAMES = tuple(f.name for f in FEATURES)
+FEATURE_DTYPES = {f.name: f.dtype for f in FEATURES}
+FEATURE_DEFAULTS = {f.name: f.default for f in FEATURES}
+
+# Matrices handed to the model are always C-contiguous float32.
+MATRIX_DTYPE = np.float32
+
+_DEFAULTS = np.array([f.default for f in FEATURES], dtype=MATRIX_DTYPE)
+_MINS = np.array([f.min for f in FEATURES], dtype=MATRIX_DTYPE)
+_MAXS = np.array([f.max for f in FEATURES], dtype=MATRIX_DTYPE)
+_INT_COLS = np.array([np.issubdtype(np.dtype(f.dtype), np.integer) for f in FEATURES])
+
+# A representative high-risk transaction, used when no context is supplied.
+EXAMPLE_TRANSACTION = {
+    "amount": 900,
+    "ip_distance": 120,
+    "device_type_id": 2,
+    "time_of_day": 23,
+    "tx_frequency": 5,
+    "merchant_risk": 0.7,
+    "account_age": 500,
+    "location_deviation": 10,
+}
+
+
+def describe() -> list:
+    """Return the schema as a JSON-serializable list of field descriptions."""
+    return [f._asdict() for f in FEATURES]
+
+
+def validate(matrix: np.ndarray) -> np.ndarray:
+    """
+    Return a boolean mask of rows whose values are finite, within range and,
+    for integer features, whole numbers.
+    """
+    in_range = np.isfinite(matrix) & (matrix >= _MINS) & (matrix <= _MAXS)
+    whole = ~_INT_COLS | (matrix == np.round(matrix))
+    return (in_range & whole).all(axis=1)
+
+
+def _to_numeric(column: pd.Series) -> pd.Series:
+    """Coerce a column to numbers, mapping unparsable cells (including lists/dicts) to NaN."""
+    try:
+        return pd.to_numeric(column, errors="coerce")
+    except (TypeError, ValueError):
+        return column.map(lambda v: pd.to_numeric(v, errors="coerce") if pd.api.types.is_scalar(v) else np.nan)
+
+
+def from_frame(df: pd.DataFrame):
+    """
+    Convert a DataFrame into a (matrix, valid_mask) pair.
+    Missing columns and empty cells take the schema default; non-numeric cells
+    mark the row invalid. Extra columns are ignored.
+    """
+    frame = df.reindex(columns=list(FEATURE_NAMES))
+    missing = frame.isna().to_numpy()
+    numeric = frame.apply(_to_numeric).to_numpy(dtype=MATRIX_DTYPE)
+    unparsable = np.isnan(numeric) & ~missing
+
+    matrix = np.where(missing, _DEFAULTS, numeric).astype(MATRIX_DTYPE, order="C", copy=False)
+    valid = ~unparsable.any(axis=1) & validate(matrix)
+    return matrix, valid
+
+
+def from_records(records: list):
+    """
+    Convert a list of transaction dictionaries into a (matrix, valid_mask) pair.
+    Items that are not dictionaries are marked invalid.
+    """
+    is_dict = np.array([isinstance(r, dict) for r in records], dtype=bool)
+    frame = pd.DataFrame.from_records(
+        [r if ok else {} for r, ok in zip(records, is_dict)],
+        columns=list(FEATURE_NAMES),
+    )
+    matrix, valid = from_frame(frame)
+    return matrix, valid & is_dict
+
+
+def from_dict(data: dict):
+    """Convert a single transaction dictionary into a (1, n_features) matrix and validity flag."""
+    matrix, valid = from_records([data])
+    return matrix, bool(valid[0])
+
+
+def from_arrow(batch):
+    """
+    Convert a pyarrow Table or RecordBatch into a (matrix, valid_mask) pair,
+    casting column-wise without going through Python objects.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    matrix = np.empty((batch.num_rows, len(FEATURES)), dtype=MATRIX_DTYPE)
+    unparsable = np.zeros(batch.num_rows, dtype=bool)
+    names = set(batch.schema.names)
+    for i, f in enumerate(FEATURES):
+        if f.name not in names:
+            matrix[:, i] = f.default
+            continue
+        column = batch.column(f.name)
+        missing = column.is_null().to_numpy(zero_copy_only=False)
+        try:
+            values = pc.cast(column, pa.float32()).to_numpy(zero_copy_only=False)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            values = pd.to_numeric(column.to_pandas(), errors="coerce").to_numpy(dtype=MATRIX_DTYPE)
+        unparsable |= np.isnan(values) & ~missing
+        matrix[:, i] = np.where(missing, f.default, values)
+    return matrix, ~unparsable & validate(matrix)
+
+
+def iter_parquet(path: str, batch_size: int = 65536):
+    """Yield (matrix, valid_mask) pairs for each record batch of a Parquet file."""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    columns = [name for name in FEATURE_NAMES if name in parquet_file.schema_arrow.names]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield from_arrow(batch)
+
+
+def to_frame(matrix: np.ndarray) -> pd.DataFrame:
+    """Build a compact DataFrame with the schema's per-column dtypes."""
+    return pd.DataFrame(matrix, columns=list(FEATURE_NAMES)).astype(FEATURE_DTYPES)
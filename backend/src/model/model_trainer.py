@@ -4,6 +4,7 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 import joblib
 import os
+from model import feature_schema
 from utils.logger import log_event
 
 def generate_labels(df):
@@ -30,12 +31,11 @@ def train_model():
     df = pd.read_csv(data_file)
     df['is_fraud'] = generate_labels(df)
     
-    feature_cols = [
-        "amount", "ip_distance", "device_type_id", "time_of_day", 
-        "tx_frequency", "merchant_risk", "account_age", "location_deviation"
-    ]
-    X = df[feature_cols]
-    y = df['is_fraud']
+    X, valid = feature_schema.from_frame(df)
+    if not valid.all():
+        log_event("Dropped invalid training rows", {"count": int((~valid).sum())})
+    X = X[valid]
+    y = df['is_fraud'].to_numpy()[valid]
     
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
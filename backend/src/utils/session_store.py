@@ -0,0 +1,76 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class Session:
+    """
+    Server-side conversation state for one chat client.
+    - history: recent (role, content) turns kept verbatim, role is "user" or "assistant"
+    - summary: condensed text of older turns that were folded out of history
+    - agent: most recent routing decision ("compliance", "fraud" or "none")
+    - transaction / fraud_result: saved transaction context and its cached score
+    - compacting: True while older turns are being summarized in the background
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.history = []
+        self.summary = ""
+        self.agent = None
+        self.transaction = None
+        self.fraud_result = None
+        self.compacting = False
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+
+    def set_transaction(self, transaction: dict):
+        """Store a transaction, dropping the cached score if it changed."""
+        if transaction != self.transaction:
+            self.transaction = transaction
+            self.fraud_result = None
+
+
+class SessionStore:
+    """Bounded, thread-safe in-memory session store with LRU eviction and idle TTL."""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: int = 3600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_access <= self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id: str):
+        """Return the live session for session_id, or None if it is unknown or expired."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_access = now
+            return session
+
+    def create(self) -> Session:
+        """Start a new session, evicting the least recently used one if the store is full."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = Session(uuid.uuid4().hex)
+            session.last_access = now
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model import feature_schema as fs
+
+
+def _col(name):
+    return fs.FEATURE_NAMES.index(name)
+
+
+def test_from_records_validity_mask():
+    records = [
+        {},                                   # every key missing -> defaults
+        {"amount": None},                     # explicit None -> default
+        {"amount": "12.5"},                   # numeric string is parsed
+        {"amount": "abc"},                    # non-numeric string
+        {"amount": [1, 2]},                   # list value
+        "abc",                                # not a dict
+        {"amount": 2e6},                      # above range
+        {"merchant_risk": -0.1},              # below range
+        {"device_type_id": 1.5},              # integer feature with a fraction
+    ]
+    matrix, valid = fs.from_records(records)
+
+    assert valid.tolist() == [True, True, True, False, False, False, False, False, False]
+    assert matrix.shape == (len(records), len(fs.FEATURES))
+    np.testing.assert_array_equal(matrix[0], fs._DEFAULTS)
+    assert matrix[1, _col("amount")] == fs.FEATURE_DEFAULTS["amount"]
+    assert matrix[2, _col("amount")] == np.float32(12.5)
+
+
+def test_from_dict_flags_invalid_row():
+    _, valid = fs.from_dict(fs.EXAMPLE_TRANSACTION)
+    assert valid
+    _, valid = fs.from_dict({**fs.EXAMPLE_TRANSACTION, "time_of_day": 25})
+    assert not valid
+
+
+def test_from_frame_dtype_layout_and_defaults():
+    df = pd.DataFrame({
+        "location_deviation": [1.0, np.nan],   # out of schema order, with a gap
+        "amount": [10.0, 20.0],
+        "extra": ["ignored", "ignored"],
+    })
+    matrix, valid = fs.from_frame(df)
+
+    assert matrix.dtype == np.float32
+    assert matrix.flags["C_CONTIGUOUS"]
+    assert valid.tolist() == [True, True]
+    assert matrix[:, _col("amount")].tolist() == [10.0, 20.0]
+    assert matrix[1, _col("location_deviation")] == fs.FEATURE_DEFAULTS["location_deviation"]
+    assert matrix[0, _col("account_age")] == fs.FEATURE_DEFAULTS["account_age"]
+
+
+def test_to_frame_uses_schema_dtypes():
+    matrix, _ = fs.from_records([fs.EXAMPLE_TRANSACTION])
+    frame = fs.to_frame(matrix)
+
+    assert list(frame.columns) == list(fs.FEATURE_NAMES)
+    assert {name: str(dtype) for name, dtype in frame.dtypes.items()} == fs.FEATURE_DTYPES
+
+
+def _mixed_frame():
+    return pd.DataFrame({
+        "amount": [10.0, None, 2e6, 5.0],
+        "device_type_id": [1, 2, 3, 4],
+        "merchant_risk": [0.1, 0.2, None, 0.3],
+    })
+
+
+def test_from_arrow_matches_from_frame():
+    pa = pytest.importorskip("pyarrow")
+    df = _mixed_frame()
+
+    expected_matrix, expected_valid = fs.from_frame(df)
+    matrix, valid = fs.from_arrow(pa.Table.from_pandas(df, preserve_index=False))
+
+    np.testing.assert_array_equal(matrix, expected_matrix)
+    np.testing.assert_array_equal(valid, expected_valid)
+
+
+def test_from_arrow_marks_unparsable_strings():
+    pa = pytest.importorskip("pyarrow")
+    batch = pa.RecordBatch.from_pydict({"amount": ["1.5", "abc", None]})
+
+    matrix, valid = fs.from_arrow(batch)
+
+    assert valid.tolist() == [True, False, True]
+    assert matrix[0, _col("amount")] == np.float32(1.5)
+    assert matrix[2, _col("amount")] == fs.FEATURE_DEFAULTS["amount"]
+
+
+def test_iter_parquet_matches_from_frame(tmp_path):
+    pytest.importorskip("pyarrow")
+    df = _mixed_frame()
+    path = tmp_path / "transactions.parquet"
+    df.to_parquet(path, index=False)
+
+    batches = list(fs.iter_parquet(str(path), batch_size=3))
+    matrix = np.vstack([m for m, _ in batches])
+    valid = np.concatenate([v for _, v in batches])
+
+    expected_matrix, expected_valid = fs.from_frame(df)
+    assert len(batches) == 2
+    np.testing.assert_array_equal(matrix, expected_matrix)
+    np.testing.assert_array_equal(valid, expected_valid)
@@ -5,7 +5,9 @@ from streamlit_chat import message
 import requests
 import pandas as pd
 import math
-from datetime import datetime, date
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, date, timedelta
 from pathlib import Path
 from geopy.geocoders import Nominatim
 
@@ -40,6 +42,11 @@ st.markdown("<p class='subtitle'>Real-time fraud detection & regulatory complian
 BACKEND_URL = st.secrets.get("backend_url", "http://127.0.0.1:5000")
 API_KEY     = st.secrets.get("API_KEY",     "default-api-key")
 
+# --- Bulk Scoring Settings ---
+# batch_chunk_size is clamped to the backend's MAX_BATCH_SIZE when it is known
+BATCH_CHUNK_SIZE = int(st.secrets.get("batch_chunk_size", 500))
+BATCH_WORKERS    = int(st.secrets.get("batch_workers", 4))
+
 # --- Geolocator ---
 geolocator = Nominatim(user_agent="risk_compliance_app")
 
@@ -60,18 +67,140 @@ def haversine(lat1, lon1, lat2, lon2):
     c = 2*math.atan2(math.sqrt(a), math.sqrt(1-a))
     return R * c
 
-# --- API Helper ---
-@st.cache_data(show_spinner=False)
-def call_api(endpoint: str, payload: dict):
-    headers = {"X-API-Key": API_KEY, "Content-Type": "application/json"}
+# --- API Helpers ---
+@st.cache_resource
+def get_session():
+    """Shared keep-alive session so repeated calls reuse pooled connections."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=BATCH_WORKERS, pool_maxsize=BATCH_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"X-API-Key": API_KEY, "Content-Type": "application/json"})
+    return session
+
+def _post(endpoint: str, payload: dict, session=None):
+    """POST to the backend; pass session explicitly when calling from worker threads."""
+    session = session or get_session()
     try:
-        resp = requests.post(f"{BACKEND_URL}/api/{endpoint}", json=payload, headers=headers, timeout=60)
+        resp = session.post(f"{BACKEND_URL}/api/{endpoint}", json=payload, timeout=60)
         if resp.ok:
             return resp.json(), None
         return None, f"{resp.status_code} - {resp.text}"
     except requests.exceptions.RequestException as e:
         return None, str(e)
 
+def ask_assistant(query: str, follow_up: bool):
+    """
+    Send a chat turn within the backend session. The transaction context is only
+    sent when it changed (null clears it server-side) or when a new session starts.
+    If the backend no longer knows the session, a new one is started with the
+    saved context and the turn is sent once more. Returns (response, error, restarted).
+    """
+    tx        = st.session_state.get("tx_context")
+    restarted = False
+    for _ in range(2):
+        session_id = st.session_state.get("session_id")
+        payload    = {"query": query, "follow_up": follow_up}
+        if session_id:
+            payload["session_id"] = session_id
+        if not session_id or tx != st.session_state.get("sent_tx"):
+            payload["transaction"] = tx
+        try:
+            resp = get_session().post(f"{BACKEND_URL}/api/query", json=payload, timeout=60)
+        except requests.exceptions.RequestException as e:
+            return None, str(e), restarted
+        if resp.status_code == 404 and session_id:
+            # Session expired or lives on another backend instance: start a new one
+            st.session_state.pop("session_id", None)
+            restarted = True
+            continue
+        if not resp.ok:
+            return None, f"{resp.status_code} - {resp.text}", restarted
+        data = resp.json()
+        st.session_state.session_id = data.get("session_id")
+        st.session_state.sent_tx    = tx
+        return data, None, restarted
+    return None, "Could not start a conversation session.", restarted
+
+def reset_conversation():
+    if session_id := st.session_state.pop("session_id", None):
+        try:
+            get_session().delete(f"{BACKEND_URL}/api/session/{session_id}", timeout=10)
+        except requests.exceptions.RequestException:
+            pass
+    st.session_state.pop("sent_tx", None)
+    st.session_state.chat_history = [(False, "Hi! What can I assist you with?")]
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _fetch_feature_schema():
+    # Raises on failure so that errors are never cached
+    resp = get_session().get(f"{BACKEND_URL}/api/feature_schema", timeout=10)
+    resp.raise_for_status()
+    data = resp.json()
+    if "features" not in data:
+        raise KeyError("features")
+    return data
+
+def get_feature_schema():
+    """
+    Feature schema (names, defaults, valid ranges) and batch size limit as served
+    by the backend, or {} if unavailable.
+    """
+    try:
+        return _fetch_feature_schema()
+    except (requests.exceptions.RequestException, KeyError, ValueError):
+        return {}
+
+def _field(spec: dict, name: str, key: str, fallback):
+    """Attribute of a schema feature, or fallback when the schema doesn't define it."""
+    return spec.get(name, {}).get(key, fallback)
+
+def _df_to_records(df: pd.DataFrame, columns=None):
+    """
+    Rows as JSON-safe dicts limited to columns (when given); missing cells are
+    dropped so backend defaults apply.
+    """
+    if columns:
+        df = df[[c for c in columns if c in df.columns]]
+    return [
+        {k: v for k, v in row.items() if pd.notna(v)}
+        for row in df.to_dict(orient="records")
+    ]
+
+def score_dataframe(df: pd.DataFrame, columns=None, chunk_size=BATCH_CHUNK_SIZE, progress=None):
+    """
+    Score every row of df via the batch endpoint, sending chunks in parallel.
+    Only the given feature columns are sent; all columns are sent if none are given.
+    Returns the scored frame, the chunk errors and the positions of rows in failed chunks.
+    """
+    session = get_session()  # resolved here: worker threads have no Streamlit script context
+    records = _df_to_records(df, columns)
+    chunks  = [(start, records[start:start + chunk_size]) for start in range(0, len(records), chunk_size)]
+    results = [None] * len(records)
+    errors  = []
+    failed  = []
+    done    = 0
+    with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+        futures = {pool.submit(_post, "predict_batch", {"transactions": chunk}, session): (start, chunk) for start, chunk in chunks}
+        for future in as_completed(futures):
+            start, chunk = futures[future]
+            resp, err = future.result()
+            if resp and len(resp.get("results") or []) != len(chunk):
+                resp, err = None, f"Expected {len(chunk)} results, got {len(resp.get('results') or [])}"
+            if resp:
+                results[start:start + len(chunk)] = resp["results"]
+            else:
+                errors.append(err)
+                failed.extend(range(start, start + len(chunk)))
+                results[start:start + len(chunk)] = [{"error": err}] * len(chunk)
+            done += len(chunk)
+            if progress is not None:
+                progress.progress(done / len(records), text=f"Scored {done:,} / {len(records):,} rows")
+    scored = df.copy()
+    scored["fraud_probability"] = [r.get("fraud_probability") for r in results]
+    scored["risk_level"]        = [r.get("risk_level") or "error" for r in results]
+    return scored, errors, sorted(failed)
+
 # --- Sidebar Navigation ---
 with st.sidebar:
     selected = option_menu(
@@ -101,13 +230,22 @@ if selected == "Assistant":
                 key="input_q",
                 placeholder="e.g. What are the latest GDPR requirements?"
             )
+            follow_up = st.checkbox(
+                "Follow-up to previous answer",
+                value=False,
+                key="follow_up",
+                help="Let the previous specialist answer without re-routing the question.",
+            ) if len(st.session_state.chat_history) > 1 else False
             send     = st.form_submit_button("Send")
         if send and user_msg:
             st.session_state.chat_history.append((True, user_msg))
-            payload = {"query": user_msg}
-            if tx := st.session_state.get("tx_context"):
-                payload["transaction"] = tx
-            resp, err = call_api("query", payload)
+            resp, err, restarted = ask_assistant(user_msg, follow_up)
+            if restarted:
+                st.session_state.chat_history.append((
+                    False,
+                    "⚠️ The server no longer had our conversation, so I started a new one. "
+                    "Earlier messages are not part of my context anymore.",
+                ))
             answer = resp.get("response") if resp else f"Error: {err}"
             st.session_state.chat_history.append((False, answer))
 
@@ -115,6 +253,8 @@ if selected == "Assistant":
         #     cls = "user-bubble" if is_user else "ai-bubble"
         #     st.markdown(f"<div class='{cls}'>{msg}</div>", unsafe_allow_html=True)
 
+        st.button("New conversation", key="new_conv", on_click=reset_conversation)
+
         for idx, (is_user, msg) in enumerate(st.session_state.chat_history):
             avatar = "shapes" if is_user else "shapes"
             seed = "Felix" if is_user else "assistant"
@@ -131,28 +271,91 @@ if selected == "Assistant":
         st.subheader("Transaction Context")
         st.markdown("Provide intuitive inputs. Addresses will be geocoded.")
         tx = None
+        backend_schema = get_feature_schema()
+        schema         = backend_schema.get("features", [])
+        chunk_size     = max(1, min(BATCH_CHUNK_SIZE, backend_schema.get("max_batch_size", BATCH_CHUNK_SIZE)))
         uploaded = st.file_uploader(
             "Upload CSV of model features",
             type=["csv"],
-            help="CSV must have raw features: amount, ip_distance, device_type_id, time_of_day, tx_frequency, merchant_risk, account_age, location_deviation"
+            help="CSV must have raw features: " + (", ".join(f["name"] for f in schema) or "see the backend feature schema")
         )
         if uploaded:
             df = pd.read_csv(uploaded)
             st.dataframe(df)
+            if missing_cols := [f["name"] for f in schema if f["name"] not in df.columns]:
+                st.warning(f"Missing columns will use backend defaults: {', '.join(missing_cols)}")
             idx = st.selectbox("Select row index", df.index, key="csv_idx")
             tx = df.loc[idx].to_dict()
             st.success(f"Loaded transaction from row {idx}")
+
+            # Bulk scoring: results are kept per file hash so reruns don't rescore
+            file_hash    = hashlib.sha256(uploaded.getvalue()).hexdigest()
+            bulk_results = st.session_state.setdefault("bulk_results", {})
+            feature_cols = [f["name"] for f in schema]
+            if file_hash not in bulk_results and st.button("Score all rows", key="score_all"):
+                progress = st.progress(0.0, text="Scoring transactions...")
+                bulk_results[file_hash] = score_dataframe(df, feature_cols, chunk_size, progress)
+                progress.empty()
+            if file_hash in bulk_results:
+                scored, errors, failed = bulk_results[file_hash]
+                if failed:
+                    st.warning(f"{len(errors)} chunk(s) failed to score ({len(failed):,} rows): {errors[0]}")
+                    if st.button("Retry failed rows", key="retry_failed"):
+                        progress = st.progress(0.0, text="Rescoring failed rows...")
+                        retried, errors, still_failed = score_dataframe(df.iloc[failed], feature_cols, chunk_size, progress)
+                        progress.empty()
+                        for col in ("fraud_probability", "risk_level"):
+                            scored.iloc[failed, scored.columns.get_loc(col)] = retried[col].to_numpy()
+                        failed = [failed[i] for i in still_failed]
+                        bulk_results[file_hash] = (scored, errors, failed)
+                        st.rerun()
+                st.markdown("**Risk scores for all rows** (click a column header to sort):")
+                st.dataframe(scored.sort_values("fraud_probability", ascending=False), use_container_width=True)
+                probs = scored["fraud_probability"].dropna()
+                if not probs.empty:
+                    bins = pd.cut(probs, bins=[i / 20 for i in range(21)], include_lowest=True)
+                    hist = bins.value_counts(sort=False)
+                    hist.index = [f"{iv.left:.2f}–{iv.right:.2f}" for iv in hist.index]
+                    st.markdown("**Fraud probability distribution**")
+                    st.bar_chart(hist)
         else:
             st.markdown("**Or enter details manually:**")
+            if not schema:
+                st.caption("Feature schema unavailable from the backend; using built-in input ranges.")
+            spec = {f["name"]: f for f in schema}
             c1, c2 = st.columns(2)
             with c1:
-                amount      = st.number_input("Amount (USD)", 0.01, 1e6, 50.0, key="ctx_amt")
+                amount      = st.number_input(
+                    "Amount (USD)",
+                    float(_field(spec, "amount", "min", 0.01)),
+                    float(_field(spec, "amount", "max", 1e6)),
+                    50.0,
+                    key="ctx_amt",
+                )
                 origin_addr = st.text_input("Transaction Origin (city or address)", key="ctx_origin")
                 merchant_addr= st.text_input("Merchant Location (city or address)", key="ctx_merchant")
-                tx_freq     = st.number_input("Transactions in Last 24h", 0, 1000, 1, key="ctx_freq")
+                tx_freq     = st.number_input(
+                    "Transactions in Last 24h",
+                    int(_field(spec, "tx_frequency", "min", 0)),
+                    int(_field(spec, "tx_frequency", "max", 1000)),
+                    1,
+                    key="ctx_freq",
+                )
             with c2:
-                merchant_risk = st.slider("Merchant Risk (0–1)", 0.0, 1.0, 0.5, key="ctx_mer")
-                acct_date     = st.date_input("Account Creation Date", value=date.today().replace(year=date.today().year-1), key="ctx_acc")
+                merchant_risk = st.slider(
+                    "Merchant Risk",
+                    float(_field(spec, "merchant_risk", "min", 0.0)),
+                    float(_field(spec, "merchant_risk", "max", 1.0)),
+                    float(_field(spec, "merchant_risk", "default", 0.5)),
+                    key="ctx_mer",
+                )
+                acct_date     = st.date_input(
+                    "Account Creation Date",
+                    value=date.today() - timedelta(days=int(_field(spec, "account_age", "default", 365))),
+                    min_value=date.today() - timedelta(days=int(_field(spec, "account_age", "max", 3650))),
+                    max_value=date.today(),
+                    key="ctx_acc",
+                )
             # Geocode addresses
             orig_lat, orig_lon = geocode_address(origin_addr) if origin_addr else (None, None)
             mer_lat, mer_lon   = geocode_address(merchant_addr) if merchant_addr else (None, None)
@@ -165,22 +368,31 @@ if selected == "Assistant":
             account_age   = (date.today() - acct_date).days
             device_sel    = st.selectbox("Device Type", ["Mobile Phone", "Desktop Computer", "Tablet Device"], key="ctx_dev")
             device_map    = {"Mobile Phone":1, "Desktop Computer":2, "Tablet Device":3}
-            tx = {
+            inputs = {
                 "amount":             round(amount,2),
-                "ip_distance":        round(dist_km,2) if dist_km else 0,
-                "device_type_id":     device_map.get(device_sel,1),
+                "ip_distance":        round(dist_km,2) if dist_km else None,
+                "device_type_id":     device_map.get(device_sel),
                 "time_of_day":        time_of_day,
                 "tx_frequency":       tx_freq,
                 "merchant_risk":      merchant_risk,
                 "account_age":        account_age,
-                "location_deviation": round(dist_km,2) if dist_km else 0,
+                "location_deviation": round(dist_km,2) if dist_km else None,
+            }
+            # Keys and fallbacks follow the served schema when available; inputs it doesn't know are dropped
+            tx = {
+                name: inputs[name] if inputs.get(name) is not None else _field(spec, name, "default", 0)
+                for name in (list(spec) or list(inputs))
             }
-        if st.button("Save Context", key="save_ctx"):
+        save_col, clear_col = st.columns(2)
+        if save_col.button("Save Context", key="save_ctx"):
             if tx:
                 st.session_state.tx_context = tx
                 st.success("✅ Transaction context saved.")
             else:
                 st.error("No transaction context to save.")
+        if clear_col.button("Clear Context", key="clear_ctx"):
+            st.session_state.pop("tx_context", None)
+            st.success("Transaction context cleared.")
 
 # --- About Page ---
 elif selected == "About":